@@ -0,0 +1,308 @@
+# shopee_ads_api_test.py
+# ========================================
+# Shopee Ads API Discovery - Phase 1
+# ยิงทดสอบ endpoint ที่คาดว่าเป็น Ads API
+# เพื่อหาว่าตัวไหนใช้งานได้จริงกับ cookie ของเรา
+# ผลลัพธ์เอาไปใส่ Config ใน shopee_ads_monitor.py
+# ========================================
+
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # decode เร็วกว่า stdlib json (ตัวเลือกเสริม)
+except ImportError:
+    orjson = None
+
+COOKIE_FILE = 'ads_cookie.txt'
+
+CREATOR_BASE = "https://creator.shopee.co.th"
+SELLER_BASE = "https://seller.shopee.co.th"
+AFFILIATE_BASE = "https://affiliate.shopee.co.th"
+
+# ========================================
+# Endpoint ที่จะทดสอบ (เดาจาก pattern ของ Shopee + ที่ใช้งานจริงใน bot live)
+# ========================================
+TEST_ENDPOINTS = {
+    # --- ที่ใช้งานได้แน่นอน (เอาไว้เช็คว่า cookie ยังไม่หมดอายุ) ---
+    'creator_user_info': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/userInfo",
+    },
+    'creator_session_list': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/realtime/sessionList",
+        'params': {'page': 1, 'pageSize': 10},
+    },
+    # --- เดา: Ads ฝั่ง creator ---
+    'creator_ads_balance': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/ads/balance",
+    },
+    'creator_ads_info': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/ads/info",
+    },
+    'creator_ads_campaign_list': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/ads/campaign/list",
+        'params': {'page': 1, 'pageSize': 20},
+    },
+    'creator_ads_campaign_detail': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/ads/campaign/detail",
+    },
+    'creator_ads_report': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/ads/report",
+    },
+    'creator_live_ads': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/live/ads",
+    },
+    # --- เดา: Ads ฝั่ง seller (Shopee Ads ของร้าน) ---
+    'seller_pas_homepage': {
+        'method': 'GET',
+        'url': f"{SELLER_BASE}/api/pas/v1/homepage/",
+    },
+    'seller_pas_balance': {
+        'method': 'GET',
+        'url': f"{SELLER_BASE}/api/pas/v1/account/balance/",
+    },
+    'seller_pas_campaign_list': {
+        'method': 'GET',
+        'url': f"{SELLER_BASE}/api/pas/v3/campaign/list/",
+        'params': {'offset': 0, 'limit': 20},
+    },
+    'seller_marketing_pas_list': {
+        'method': 'GET',
+        'url': f"{SELLER_BASE}/api/marketing/v3/pas/campaign/list/",
+        'params': {'offset': 0, 'limit': 20},
+    },
+    'seller_marketing_pas_report': {
+        'method': 'GET',
+        'url': f"{SELLER_BASE}/api/marketing/v3/pas/report/",
+    },
+    'seller_pas_meta': {
+        'method': 'GET',
+        'url': f"{SELLER_BASE}/api/pas/v1/meta/",
+    },
+    'seller_pas_credit': {
+        'method': 'GET',
+        'url': f"{SELLER_BASE}/api/pas/v1/credit/overview/",
+    },
+    'seller_pas_campaign_budget': {
+        'method': 'POST',
+        'url': f"{SELLER_BASE}/api/pas/v3/campaign/update_budget/",
+        'payload': {},
+    },
+    'seller_pas_campaign_pause': {
+        'method': 'POST',
+        'url': f"{SELLER_BASE}/api/pas/v3/campaign/pause/",
+        'payload': {},
+    },
+    'seller_pas_campaign_resume': {
+        'method': 'POST',
+        'url': f"{SELLER_BASE}/api/pas/v3/campaign/resume/",
+        'payload': {},
+    },
+    # --- เดา: live ads boost ฝั่ง creator ---
+    'creator_boost_info': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/boost/info",
+    },
+    'creator_boost_list': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/boost/list",
+        'params': {'page': 1, 'pageSize': 20},
+    },
+    'creator_wallet': {
+        'method': 'GET',
+        'url': f"{CREATOR_BASE}/supply/api/lm/sellercenter/wallet/info",
+    },
+    # --- เดา: affiliate ---
+    'affiliate_ads_overview': {
+        'method': 'GET',
+        'url': f"{AFFILIATE_BASE}/api/v1/ads/overview",
+    },
+    'affiliate_campaign_list': {
+        'method': 'GET',
+        'url': f"{AFFILIATE_BASE}/api/v1/campaign/list",
+        'params': {'page': 1, 'pageSize': 20},
+    },
+    'affiliate_user_info': {
+        'method': 'GET',
+        'url': f"{AFFILIATE_BASE}/api/v1/user/info",
+    },
+}
+
+# ========================================
+# Session กลาง: reuse TCP+TLS connection เดิมทุก probe (keep-alive)
+# ถ้ามี httpx ใช้ HTTP/2 ด้วย - probe หลายตัว multiplex บน connection เดียว
+# ========================================
+try:
+    import httpx
+    SESSION = httpx.Client(http2=True, timeout=10.0)
+except ImportError:
+    SESSION = requests.Session()
+    _adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+    )
+    SESSION.mount('https://', _adapter)
+
+# ========================================
+# กันยิงรัวเกิน: Semaphore จำกัดยิงพร้อมกัน + token bucket ต่อ host
+# (แทน time.sleep(0.5) แบบ serial ของเดิม)
+# ========================================
+SEM = threading.Semaphore(4)  # ยิงพร้อมกันสูงสุด 4 requests
+MIN_GAP_SEC = 0.15  # ระยะห่างขั้นต่ำต่อ host
+
+_host_lock = threading.Lock()
+_host_next_slot = {}  # hostname -> เวลา (monotonic) ที่ยิงได้ครั้งถัดไป
+
+
+def _rate_gate(url):
+    """จอง slot การยิงของ host นั้นๆ แล้วรอจนถึงคิวตัวเอง"""
+    host = urlparse(url).hostname or ''
+    with _host_lock:
+        now = time.monotonic()
+        slot = max(_host_next_slot.get(host, now), now)
+        _host_next_slot[host] = slot + MIN_GAP_SEC
+    wait = slot - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+
+
+# ========================================
+# Cookie / Headers
+# ========================================
+_COOKIE_RE = re.compile(r'([^=;\s]+)=([^;]*)')
+
+
+def parse_cookies(cookie_str):
+    # scan รอบเดียวด้วย regex แทน split ซ้อน split
+    return {m.group(1): m.group(2).strip()
+            for m in _COOKIE_RE.finditer(cookie_str or '')}
+
+
+def get_headers(cookies):
+    return {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Content-Type': 'application/json',
+        'x-csrftoken': cookies.get('csrftoken', ''),
+        'Referer': 'https://creator.shopee.co.th/insight/live/list',
+    }
+
+
+# ========================================
+# ยิงทดสอบ 1 endpoint
+# ========================================
+def test_endpoint(name, cfg, headers, cookies):
+    """ยิง endpoint แล้ว return (name, status_code, ok, note)"""
+    url = cfg['url']
+    _rate_gate(url)
+    try:
+        with SEM:
+            # ส่ง cookies ต่อ call (ไม่ยัดใส่ session jar - แต่ละ probe อิสระกัน)
+            if cfg['method'] == 'POST':
+                resp = SESSION.post(url, headers=headers, cookies=cookies,
+                                    json=cfg.get('payload', {}), timeout=10)
+            else:
+                resp = SESSION.get(url, headers=headers, cookies=cookies,
+                                   params=cfg.get('params'), timeout=10)
+    except Exception as e:
+        print(f"❌ {name}: {e}")
+        return (name, 0, False, str(e))
+
+    print(f"\n{'='*60}")
+    print(f"🔍 {name}")
+    print(f"   {cfg['method']} {url}")
+    print(f"   Status: {resp.status_code}")
+
+    ok = False
+    note = ''
+    if resp.status_code == 200:
+        try:
+            data = orjson.loads(resp.content) if orjson is not None else resp.json()
+            ok = data.get('code') == 0 or data.get('success') is True
+            note = f"code={data.get('code')} msg={data.get('msg', data.get('message', ''))}"
+            # orjson dumps เป็น bytes -> slice ก่อนค่อย decode
+            # response ใหญ่ๆ ไม่ต้องสร้าง string เต็มก้อนเพื่อตัดทิ้ง 99%
+            if orjson is not None:
+                blob = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+                truncated = len(blob) > 500
+                preview = blob[:500].decode('utf-8', 'replace')
+            else:
+                full = json.dumps(data, ensure_ascii=False, indent=2)
+                truncated = len(full) > 500
+                preview = full[:500]
+            print(f"   Response (first 500 chars):\n{preview}{'...' if truncated else ''}")
+        except Exception:
+            note = 'ไม่ใช่ JSON'
+            print(f"   ⚠️ Response ไม่ใช่ JSON: {resp.text[:200]}")
+    elif resp.status_code == 403:
+        note = 'ติด permission/csrf'
+    elif resp.status_code == 404:
+        note = 'ไม่มี endpoint นี้'
+    else:
+        note = resp.text[:100]
+
+    return (name, resp.status_code, ok, note)
+
+
+# ========================================
+# Main - Phase 1 ยิงทุก endpoint พร้อมกัน
+# ========================================
+def main():
+    try:
+        with open(COOKIE_FILE, encoding='utf-8') as f:
+            cookie_str = f.read().strip()
+    except FileNotFoundError:
+        print(f"❌ ไม่พบไฟล์ {COOKIE_FILE} - เอา cookie จาก browser มาใส่ก่อน")
+        return
+
+    cookies = parse_cookies(cookie_str)
+    headers = get_headers(cookies)
+
+    print(f"🚀 เริ่มทดสอบ {len(TEST_ENDPOINTS)} endpoints...")
+    start = time.time()
+
+    results = []
+    # ยิงพร้อมกันทั้งหมด (SEM + token bucket คุม rate ต่อ host อยู่แล้ว)
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        futures = {ex.submit(test_endpoint, name, cfg, headers, cookies): name
+                   for name, cfg in TEST_ENDPOINTS.items()}
+        for fut in as_completed(futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                print(f"❌ {futures[fut]}: {e}")
+                results.append((futures[fut], 0, False, str(e)))
+
+    # ========================================
+    # สรุปผล
+    # ========================================
+    print(f"\n\n{'='*60}")
+    print(f"📊 สรุปผล ({time.time()-start:.2f} วินาที)")
+    print(f"{'='*60}")
+    results.sort(key=lambda r: (not r[2], r[0]))
+    for name, status, ok, note in results:
+        icon = '✅' if ok else ('🔒' if status == 403 else '❌')
+        print(f"{icon} {name:<32} {status:<5} {note}")
+
+    good = [r[0] for r in results if r[2]]
+    print(f"\n✅ ใช้งานได้ {len(good)}/{len(results)}: {', '.join(good) if good else '-'}")
+
+
+if __name__ == '__main__':
+    main()
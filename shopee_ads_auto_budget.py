@@ -0,0 +1,683 @@
+# shopee_ads_auto_budget.py
+# ========================================
+# Auto Budget Engine
+# อ่าน campaign ที่ตั้งค่าไว้ใน Firebase (หน้าเว็บ admin เป็นคนใส่)
+# เทียบกับข้อมูล live + snapshot แล้วตัดสินใจ เพิ่ม budget / พัก / ปลุก
+# ทำงานคู่กับ shopee_ads_monitor.py (ตัวนั้นเป็นคนอัพข้อมูลดิบขึ้นไป)
+# ========================================
+
+import functools
+import logging
+import random
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from shopee_ads_monitor import (BudgetManager, Config, DataLoader,
+                                FirebaseManager, ShopeeAdsClient)
+
+log = logging.getLogger('auto_budget')
+
+SNAPSHOT_RETENTION_MIN = 240   # เก็บ snapshot ย้อนหลัง 4 ชม. พอสำหรับ window 180
+CLEANUP_INTERVAL_SEC = 3600    # ล้าง snapshot เก่าชั่วโมงละครั้ง
+MIN_EVAL_GAP_SEC = 5           # มี event เข้ามาก็รอขั้นต่ำเท่านี้ก่อนประเมินรอบใหม่
+WINDOW_MINS = (15, 60, 180)    # window ที่ใช้ประเมินตะกร้า
+MAX_SLEEP_SEC = 300            # เพดานการหลับต่อรอบ ต่อให้ไม่มีคิวงานเลย
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_hm(s):
+    """'HH:MM' -> นาทีของวัน (None ถ้า format เพี้ยน) - config เดิม parse ครั้งเดียวพอ"""
+    try:
+        h, m = map(int, s.split(':'))
+    except ValueError:
+        return None
+    return h * 60 + m
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_sched(s):
+    """'HH:MM,HH:MM,...' -> frozenset ของนาทีของวัน"""
+    out = set()
+    for part in s.split(','):
+        hm = _parse_hm(part.strip())
+        if hm is not None:
+            out.add(hm)
+    return frozenset(out)
+
+
+# ตัวเลขของ campaign แปลงครั้งเดียวต่อรอบ - evaluator หยิบ attribute ได้เลย
+# ไม่ต้อง .get + float() ซ้ำในทุกเงื่อนไข
+CampaignView = namedtuple('CampaignView', [
+    'cam_id', 'channel', 'spent', 'budget', 'roas', 'roas_target',
+    'threshold', 'active', 'competition', 'interval_min', 'last_action_ms',
+    'min_cart'])
+
+
+def _view(cam_id, cam):
+    return CampaignView(
+        cam_id,
+        cam.get('channel', ''),
+        float(cam.get('spent_today', 0) or 0),
+        float(cam.get('daily_budget', 200) or 200),
+        float(cam.get('roas', 0) or 0),
+        float(cam.get('roas_target', 8) or 8),
+        float(cam.get('budget_threshold', 0.8) or 0.8),
+        cam.get('status', 'active') == 'active',
+        cam.get('mode', 'normal') == 'competition',
+        float(cam.get('competition_interval', 30) or 30),
+        float(cam.get('last_auto_action', 0) or 0),
+        float(cam.get('min_cart_per_100', 1) or 1),
+    )
+
+
+# bind ไว้ระดับ module ครั้งเดียว - ใน hot loop เรียกชื่อสั้นได้เลย
+# ไม่ต้อง lookup attribute ของ BudgetManager ซ้ำทุก campaign
+_calc_inc = BudgetManager.calc_increment
+_round_up = BudgetManager.round_up
+_validate = BudgetManager.validate
+
+
+# ชุดอักขระของ push id Firebase (เรียงตาม ascii - key ใหม่ต่อท้ายเสมอ)
+_PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+
+
+def _push_id(now_ms=None):
+    """สร้าง push id สไตล์ Firebase เองฝั่งเรา (เวลา 8 ตัว + สุ่ม 12 ตัว)
+    SDK ตัว python ไม่มีทาง gen key โดยไม่ยิง network - อันนี้ 0 RTT"""
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    ts = ''
+    for _ in range(8):
+        ts = _PUSH_CHARS[now_ms % 64] + ts
+        now_ms //= 64
+    return ts + ''.join(random.choice(_PUSH_CHARS) for _ in range(12))
+
+
+def _bump_rev(fb, section):
+    """บอกรอบถัดไปว่า subtree นี้เปลี่ยนแล้ว (จะได้อ่านใหม่เฉพาะที่จำเป็น)"""
+    fb.get_ref(f'shopee_ads/meta/revs/{section}').transaction(
+        lambda cur: (cur or 0) + 1)
+
+
+class LiveIndex:
+    """index ข้อมูล live ตามชื่อช่อง (ตัวเล็ก) - สร้างรอบละครั้งใน run_cycle
+    แล้วใช้ร่วมกันทั้ง snapshot / evaluator / merge ไม่ต้อง scan ซ้ำ"""
+
+    def __init__(self, live_data):
+        self.by_channel = {str(v.get('channel', '')).lower(): v
+                           for v in (live_data or {}).values()
+                           if isinstance(v, dict)}
+
+    def get(self, channel_name):
+        return self.by_channel.get(str(channel_name).lower())
+
+
+# ========================================
+# Snapshot: เก็บสถานะ campaign + live ลง Firebase ทุก 5 นาที
+# ========================================
+class SnapshotManager:
+    def __init__(self, fb, on_snapshot=None):
+        self.fb = fb
+        self.last_snapshot_time = 0.0
+        self.on_snapshot = on_snapshot  # แจ้ง engine ให้ต่อท้าย window ของมัน
+
+    def take_snapshot(self, campaigns, live_idx):
+        """ลง snapshot ของทุก campaign - รวมเป็น multi-path update เดียว (1 RTT)"""
+        # key กว้างคงที่ 13 หลัก -> เรียง lexicographic = เรียงตามเวลาเสมอ
+        # (orderByKey/endAt ฝั่ง server ถึงจะเชื่อถือได้)
+        now_ms = f'{int(time.time() * 1000):013d}'
+        batch = {}
+        for cam_id, cam in campaigns.items():
+            if not isinstance(cam, dict):
+                continue
+            live = live_idx.get(cam.get('channel', ''))
+            snap = {
+                'ts': int(now_ms),
+                'spent': float(cam.get('spent_today', 0) or 0),
+                'budget': float(cam.get('daily_budget', 0) or 0),
+                'roas': float(cam.get('roas', 0) or 0),
+                'clicks': int(live.get('clicks', 0) or 0) if live else 0,
+                'cart': int(live.get('cart', 0) or 0) if live else 0,
+                'orders': int(live.get('orders', 0) or 0) if live else 0,
+                'sales': float(live.get('sales', 0) or 0) if live else 0.0,
+            }
+            batch[f'shopee_ads/snapshots/{cam_id}/{now_ms}'] = snap
+            if self.on_snapshot is not None:
+                self.on_snapshot(cam_id, snap['ts'], snap['spent'], snap['cart'])
+        if batch:
+            self.fb.get_ref('/').update(batch)
+            _bump_rev(self.fb, 'snapshots')
+        self.last_snapshot_time = time.time()
+
+    def cleanup_old_snapshots(self, cam_ids):
+        """ลบ snapshot ที่เก่ากว่า retention (cam_ids = key จาก read_shallow)"""
+        cutoff = f'{int((time.time() - SNAPSHOT_RETENTION_MIN * 60) * 1000):013d}'
+        deletes = {}
+        for cam_id in cam_ids:
+            # ให้ Firebase กรอง key เก่าฝั่ง server ไม่ต้องโหลด subtree ทั้งก้อน
+            stale = (self.fb.get_ref(f'shopee_ads/snapshots/{cam_id}')
+                     .order_by_key().end_at(cutoff).get())
+            if not stale:
+                continue
+            for ts in stale:
+                deletes[f'shopee_ads/snapshots/{cam_id}/{ts}'] = None
+        if deletes:
+            # multi-path update ค่า None = ลบ -> ทุก campaign จบใน RTT เดียว
+            self.fb.get_ref('/').update(deletes)
+            _bump_rev(self.fb, 'snapshots')
+
+
+# ========================================
+# Engine: ตัดสินใจจาก campaign + snapshot + live
+# ========================================
+class AutoBudgetEngine:
+    def __init__(self, fb, client):
+        self.fb = fb
+        self.client = client
+        self._snap_rev = object()   # ค่าที่ไม่มีทางเท่ากับ rev จริง -> build รอบแรกแน่นอน
+        self._snap_arrays = {}      # cam_id -> (ts, spent, cart) เรียงตามเวลา
+        # window วิ่งแบบ incremental: snapshot ใหม่ต่อท้าย ของเก่าหลุดหัว
+        # first/last ของแต่ละ window เลยอ่านได้ O(1) ไม่ต้อง scan ใหม่
+        self._windows = {}          # cam_id -> {นาที: deque ของ (ts, spent, cart)}
+
+    def record_snapshot(self, cam_id, ts_ms, spent, cart):
+        """รับ snapshot ใหม่จาก SnapshotManager แล้วอัพเดต window ทุกขนาด"""
+        wins = self._windows.get(cam_id)
+        if wins is None:
+            wins = self._windows[cam_id] = {m: deque() for m in WINDOW_MINS}
+        for m, dq in wins.items():
+            dq.append((ts_ms, spent, cart))
+            limit = ts_ms - m * 60 * 1000
+            while dq[0][0] < limit:
+                dq.popleft()
+
+    def prepare_snapshots(self, snapshots, rev=None):
+        """แปลง snapshot เป็น NumPy arrays ต่อ campaign - ทำใหม่เฉพาะตอน rev เปลี่ยน
+        หลังจากนั้น _is_cart_good แค่ searchsorted + ลบหัวท้าย ไม่ต้องวน dict"""
+        if rev is not None and rev == self._snap_rev:
+            return
+        self._snap_rev = rev
+        self._snap_arrays = {}
+        for cam_id, cam_snaps in (snapshots or {}).items():
+            if not isinstance(cam_snaps, dict) or not cam_snaps:
+                continue
+            items = sorted(cam_snaps.items())
+            n = len(items)
+            ts = np.fromiter((int(k) for k, _ in items),
+                             dtype=np.int64, count=n)
+            spent = np.fromiter(
+                (float((v or {}).get('spent', 0) or 0) for _, v in items),
+                dtype=np.float64, count=n)
+            cart = np.fromiter(
+                (float((v or {}).get('cart', 0) or 0) for _, v in items),
+                dtype=np.float64, count=n)
+            self._snap_arrays[cam_id] = (ts, spent, cart)
+
+    def _in_no_increase_window(self, cam, now_min):
+        """ช่วงเวลาห้ามเพิ่ม budget (เช่นหลังเที่ยงคืนที่ยอดตก)"""
+        start_s = cam.get('no_increase_start', '')
+        end_s = cam.get('no_increase_end', '')
+        if not start_s or not end_s:
+            return False
+        start_min = _parse_hm(str(start_s))
+        end_min = _parse_hm(str(end_s))
+        if start_min is None or end_min is None:
+            return False
+        if start_min <= end_min:
+            return start_min <= now_min <= end_min
+        return now_min >= start_min or now_min <= end_min  # ข้ามเที่ยงคืน
+
+    def _check_schedule(self, cam_id, cam, now_min, today):
+        """ตรงเวลาใน schedule_times (HH:MM,HH:MM,...) และยังไม่ยิงนาทีนี้"""
+        sched = cam.get('schedule_times', '')
+        if not sched:
+            return False
+        if now_min not in _parse_sched(str(sched)):
+            return False
+        # กันยิงซ้ำนาทีเดิม - เก็บเป็น "YYYY-MM-DD HH:MM" ไม่ใช่ HH:MM เปล่าๆ
+        # ไม่งั้นเวลาเดิมของวันถัดไปจะโดนมองว่ายิงไปแล้ว (ค่าเก่าแบบ HH:MM
+        # เทียบไม่ตรงอยู่แล้ว เลยยิงรอบแรกได้ปกติ)
+        stamp = f'{today} {now_min // 60:02d}:{now_min % 60:02d}'
+        return cam.get('last_schedule_fired') != stamp
+
+    def _window_diffs(self, cam_id, window_min, now_ms):
+        """(spent_diff, cart_diff) ของ window นี้ หรือ None ถ้าข้อมูลไม่พอ"""
+        window_start = now_ms - window_min * 60 * 1000
+        # ทางหลัก: deque ที่เลี้ยงไว้จาก record_snapshot - หยิบหัวท้ายได้เลย
+        wins = self._windows.get(cam_id)
+        dq = wins.get(window_min) if wins else None
+        if dq is not None:
+            while len(dq) > 1 and dq[0][0] < window_start:
+                dq.popleft()
+            if len(dq) >= 2:
+                first, last = dq[0], dq[-1]
+                return last[1] - first[1], last[2] - first[2]
+        # fallback: arrays จาก prepare_snapshots (เช่นเพิ่งรีสตาร์ท deque ยังว่าง)
+        arrays = self._snap_arrays.get(cam_id)
+        if arrays is None:
+            return None
+        ts, spent_arr, cart_arr = arrays
+        lo = int(np.searchsorted(ts, window_start))
+        hi = len(ts)
+        if hi - lo < 2:
+            return None
+        return (float(spent_arr[hi - 1] - spent_arr[lo]),
+                float(cart_arr[hi - 1] - cart_arr[lo]))
+
+    def _is_cart_good(self, view, window_min, now_ms):
+        """ใน window นี้ ตะกร้าเพิ่มขึ้นคุ้มกับเงินที่เสียไปไหม
+        เกณฑ์: ตะกร้าเพิ่ม >= min_cart_per_100 ต่อทุก 100 บาทที่ใช้ไป"""
+        diffs = self._window_diffs(view.cam_id, window_min, now_ms)
+        if diffs is None:
+            return False
+        spent_diff, cart_diff = diffs
+        if spent_diff <= 0:
+            return cart_diff > 0
+        return cart_diff >= (spent_diff / 100.0) * view.min_cart
+
+    def _fast_reject(self, cam, now_min):
+        """เช็คถูกๆ ก่อนว่า campaign นี้มีทางยิง action ไหม
+        ส่วนใหญ่ (นิ่งๆ ไม่ได้ใช้เงิน) จบตรงนี้โดยไม่ต้อง parse float สักตัว"""
+        sched = cam.get('schedule_times', '')
+        if sched and now_min in _parse_sched(str(sched)):
+            return False  # ถึงเวลาที่ตั้งไว้ มีสิทธิ์ยิง ต้องดูต่อ
+        if cam.get('status', 'active') != 'active':
+            return True   # พักอยู่และไม่ใช่เวลา schedule -> ไม่มีอะไรให้ทำ
+        if not cam.get('spent_today'):
+            return True   # ยังไม่ใช้เงินเลย ทั้งเกณฑ์ ROAS และ threshold ยิงไม่ได้
+        return False
+
+    def evaluate_normal(self, view, cam, now_ms, now_min, today):
+        """โหมดปกติ: ROAS ต่ำ -> พัก / budget ใกล้เต็ม+ตะกร้าดี -> เพิ่ม / ตามเวลา"""
+        if self._fast_reject(cam, now_min):
+            return None
+
+        # 1) ROAS ต่ำกว่าครึ่งเป้า -> พักก่อน
+        if view.active and 0 < view.roas < view.roas_target * 0.5:
+            return {'campaign_id': view.cam_id, 'channel': view.channel,
+                    'type': 'pause',
+                    'reason': f'ROAS ต่ำ ({view.roas:.1f} '
+                              f'< เป้า {view.roas_target:.1f})'}
+
+        # 2) ถึงเวลาที่ตั้งไว้ -> เพิ่มเลยไม่ต้องดูเงื่อนไขอื่น
+        if self._check_schedule(view.cam_id, cam, now_min, today):
+            new_budget = _round_up(view.budget + _calc_inc(view.budget))
+            return {'campaign_id': view.cam_id, 'channel': view.channel,
+                    'type': 'increase_budget', 'new_budget': new_budget,
+                    'schedule': f'{today} {now_min // 60:02d}:{now_min % 60:02d}',
+                    'reason': f'ตามเวลา {now_min // 60:02d}:{now_min % 60:02d}'}
+
+        # 3) budget ใกล้เต็ม + ตะกร้ายังดีทุก window ที่เปิดไว้ -> เพิ่ม
+        if (view.active and view.budget > 0
+                and view.spent / view.budget >= view.threshold):
+            if self._in_no_increase_window(cam, now_min):
+                return None
+            windows = cam.get('eval_windows')
+            if not windows:
+                # record เก่ายังเป็น flag แยก eval_180/60/15 - แปลงให้เป็น list
+                windows = [w for w in (180, 60, 15)
+                           if cam.get(f'eval_{w}') != False]
+            if all(self._is_cart_good(view, w, now_ms) for w in windows):
+                new_budget = _round_up(view.budget + _calc_inc(view.budget))
+                if _validate(new_budget):
+                    pct = view.spent / view.budget * 100
+                    return {'campaign_id': view.cam_id,
+                            'channel': view.channel,
+                            'type': 'increase_budget', 'new_budget': new_budget,
+                            'reason': f'ใช้ไป {pct:.0f}% และตะกร้ายังดี'}
+        return None
+
+    def evaluate_competition(self, view, cam, live, now_ms, now_min):
+        """โหมดแข่ง: ยังไลพ์อยู่ -> เพิ่ม budget ทุก competition_interval นาที"""
+        if self._in_no_increase_window(cam, now_min):
+            return None
+        if not live or live.get('status') != 'LIVE':
+            return None
+        if (now_ms - view.last_action_ms) < view.interval_min * 60 * 1000:
+            return None
+        new_budget = _round_up(view.budget + _calc_inc(view.budget))
+        if not _validate(new_budget):
+            return None
+        return {'campaign_id': view.cam_id, 'channel': view.channel,
+                'type': 'increase_budget', 'new_budget': new_budget,
+                'reason': f'โหมดแข่ง (ทุก {view.interval_min:.0f} นาที)'}
+
+    def _build_frame(self, campaigns):
+        """รวมตัวเลขทุก campaign เป็น DataFrame เดียว - เทียบ threshold ทีเดียวทั้งชุด"""
+        ids, rows = [], []
+        for cam_id, cam in campaigns.items():
+            if not isinstance(cam, dict) or cam.get('auto_enabled') is False:
+                continue
+            ids.append(cam_id)
+            rows.append((
+                float(cam.get('spent_today', 0) or 0),
+                float(cam.get('daily_budget', 200) or 200),
+                float(cam.get('roas', 0) or 0),
+                float(cam.get('roas_target', 8) or 8),
+                float(cam.get('budget_threshold', 0.8) or 0.8),
+                cam.get('status', 'active') == 'active',
+                cam.get('mode', 'normal') == 'competition',
+            ))
+        return pd.DataFrame(rows, index=ids,
+                            columns=['spent', 'budget', 'roas', 'roas_target',
+                                     'threshold', 'active', 'competition'])
+
+    def evaluate_all(self, campaigns, snapshots, live_idx, snap_rev=None,
+                     now=None):
+        self.prepare_snapshots(snapshots, snap_rev)
+        # จับเวลาครั้งเดียวต่อรอบ - ทุก campaign เห็น "ตอนนี้" ก้อนเดียวกัน
+        if now is None:
+            now = time.time()
+        now_ms = int(now * 1000)
+        now_dt = datetime.fromtimestamp(now)
+        now_min = now_dt.hour * 60 + now_dt.minute
+        today = now_dt.strftime('%Y-%m-%d')
+
+        df = self._build_frame(campaigns)
+        if df.empty:
+            return []
+        # กรองแบบ vectorized ก่อน - แถวส่วนใหญ่ตกตรงนี้โดยไม่แตะ Python loop
+        active = df['active'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct_used = np.where(df['budget'].to_numpy() > 0,
+                                df['spent'].to_numpy() / df['budget'].to_numpy(),
+                                0.0)
+        roas = df['roas'].to_numpy()
+        roas_low = active & (roas > 0) & (roas < df['roas_target'].to_numpy() * 0.5)
+        budget_full = active & (pct_used >= df['threshold'].to_numpy())
+        sched_hit = np.fromiter(
+            (now_min in _parse_sched(str(campaigns[cid].get('schedule_times', '')))
+             for cid in df.index), dtype=bool, count=len(df))
+        candidate = (df['competition'].to_numpy()
+                     | roas_low | budget_full | sched_hit)
+
+        actions = []
+        for cam_id in df.index[candidate]:
+            cam = campaigns[cam_id]
+            view = _view(cam_id, cam)
+            if view.competition:
+                live = live_idx.get(view.channel)
+                action = self.evaluate_competition(view, cam, live,
+                                                   now_ms, now_min)
+            else:
+                action = self.evaluate_normal(view, cam, now_ms, now_min,
+                                              today)
+            if action:
+                actions.append(action)
+        return actions
+
+    def execute_action(self, action, cookie_str):
+        """ลงมือจริง: อัพเดต Firebase + ยิง Shopee API + ลง action log"""
+        cam_id = action['campaign_id']
+        now_ms = int(time.time() * 1000)
+        fb_updates = {'last_auto_action': now_ms}
+        api_ok = None
+
+        if action['type'] == 'increase_budget':
+            fb_updates['daily_budget'] = action['new_budget']
+            if action.get('schedule'):
+                fb_updates['last_schedule_fired'] = action['schedule']
+            if cookie_str:
+                api_ok = self.client.set_campaign_budget(
+                    cookie_str, cam_id, action['new_budget'])
+        elif action['type'] == 'pause':
+            fb_updates['status'] = 'paused'
+            if cookie_str:
+                api_ok = self.client.pause_campaign(cookie_str, cam_id)
+        elif action['type'] == 'resume':
+            fb_updates['status'] = 'active'
+            if cookie_str:
+                api_ok = self.client.resume_campaign(cookie_str, cam_id)
+
+        # patch campaign + ลง action log ใน update เดียว -> เหลือ 1 RTT ต่อ action
+        batch = {f'shopee_ads/campaigns/{cam_id}/{k}': v
+                 for k, v in fb_updates.items()}
+        log_key = _push_id(now_ms)
+        batch[f'shopee_ads/action_log/{log_key}'] = {
+            'ts': now_ms,
+            'campaign_id': cam_id,
+            'channel': action.get('channel', ''),
+            'type': action['type'],
+            'new_budget': action.get('new_budget'),
+            'reason': action.get('reason', ''),
+            'api_ok': api_ok,
+        }
+        self.fb.get_ref('/').update(batch)
+        _bump_rev(self.fb, 'campaigns')
+        print(f"⚡ {action['type']} {action.get('channel', '')}: "
+              f"{action.get('reason', '')}")
+
+
+# ========================================
+# Monitor loop
+# ========================================
+class AdsMonitor:
+    def __init__(self):
+        self.fb = FirebaseManager()
+        self.client = ShopeeAdsClient()
+        self.engine = AutoBudgetEngine(self.fb, self.client)
+        self.snapshots = SnapshotManager(
+            self.fb, on_snapshot=self.engine.record_snapshot)
+        self.data_dict = DataLoader.load_channel_data()
+        self.last_sheet_load = time.time()
+        self.last_cleanup = 0.0
+        self._cache = {}  # section -> (rev, data) กันอ่าน subtree เดิมซ้ำทุกรอบ
+        self._cookie_idx = self._build_cookie_idx()
+        # action แต่ละตัวเป็นคนละ campaign กัน ยิงพร้อมกันได้ (I/O bound)
+        self._pool = ThreadPoolExecutor(max_workers=8)
+        self._last_merged = {}  # cam_id -> ค่าที่ merge ไปล่าสุด ไว้ diff กันเขียนซ้ำ
+        self._last_api = {}     # cam_id -> ตัวเลขจาก Shopee ล่าสุด ไว้ diff เหมือนกัน
+        self._dirty = True      # รอบแรกประเมินเสมอ
+        self._listeners = []
+        self._start_listeners()
+
+    def _start_listeners(self):
+        """ฟัง campaigns + live แบบ event-driven แทนนั่ง poll ทั้งต้นไม้
+        event เข้ามา = ทิ้ง cache ส่วนนั้นแล้วติดธงให้รอบถัดไปประเมิน"""
+        def _on_change(section):
+            def cb(event):
+                self._cache.pop(section, None)
+                self._dirty = True
+            return cb
+
+        try:
+            self._listeners.append(
+                self.fb.get_ref('shopee_ads/campaigns')
+                .listen(_on_change('campaigns')))
+            self._listeners.append(
+                self.fb.get_ref('shopee_monitor/live_shopee')
+                .listen(_on_change('live')))
+        except Exception as e:
+            log.error('ตั้ง listener ไม่ได้ จะถอยไปใช้ poll: %s', e)
+            self._listeners = []
+
+    def _build_cookie_idx(self):
+        """index ชื่อช่อง (ตัวเล็ก) -> cookie - lookup O(1) แทน scan ทุกแถว"""
+        return {str(name).lower(): (row.get('cookie', '') or '')
+                for name, row in self.data_dict.items()}
+
+    def _read_section(self, section, path, revs):
+        """อ่าน subtree เฉพาะตอน rev เปลี่ยน - rev เดิมใช้ของที่ค้างในแรมได้เลย
+        ถ้าไม่มี rev (คนเขียนฝั่งนั้นยังไม่ bump เช่น bot live) อ่านใหม่ทุกรอบ"""
+        rev = revs.get(section)
+        cached = self._cache.get(section)
+        if rev is not None and cached is not None and cached[0] == rev:
+            return cached[1]
+        data = self.fb.read(path) or {}
+        self._cache[section] = (rev, data)
+        return data
+
+    def _get_cookie_for_channel(self, channel_name):
+        return self._cookie_idx.get(str(channel_name).lower(), '')
+
+    def _merge_live_data(self, campaigns, live_idx):
+        """เอาตัวเลขจาก live (คลิก/ตะกร้า/ออเดอร์/ยอดขาย) ใส่ใน campaign"""
+        batch = {}
+        for cam_id, cam in campaigns.items():
+            if not isinstance(cam, dict):
+                continue
+            live = live_idx.get(cam.get('channel', ''))
+            if not live:
+                continue
+            new = {
+                'clicks': int(live.get('clicks', 0) or 0),
+                'cart': int(live.get('cart', 0) or 0),
+                'orders': int(live.get('orders', 0) or 0),
+                'sales': float(live.get('sales', 0) or 0),
+            }
+            # เขียนเฉพาะ field ที่เปลี่ยนจริง - ค่าเดิมเขียนซ้ำเปลือง write + ปลุก listener ฟรี
+            prev = self._last_merged.get(cam_id, {})
+            for k, v in new.items():
+                if prev.get(k) != v:
+                    batch[f'shopee_ads/campaigns/{cam_id}/{k}'] = v
+            self._last_merged[cam_id] = new
+        if batch:
+            self.fb.get_ref('/').update(batch)
+            _bump_rev(self.fb, 'campaigns')
+
+    def _update_campaigns_from_api(self, campaigns):
+        """ดึง spent/budget/roas ล่าสุดจาก Shopee มาทับใน campaign"""
+        batch = {}
+        now_ms = int(time.time() * 1000)
+        for cam_id, cam in campaigns.items():
+            if not isinstance(cam, dict):
+                continue
+            cookie = self._get_cookie_for_channel(cam.get('channel', ''))
+            if not cookie:
+                continue
+            api_cams = self.client.get_ads_campaigns(cookie)
+            if not api_cams:
+                continue
+            for api_cam in api_cams:
+                if not isinstance(api_cam, dict):
+                    continue
+                if str(api_cam.get('campaign_id', '')) != str(cam_id):
+                    continue
+                new = {
+                    'spent_today': float(
+                        api_cam.get('spent_today', api_cam.get('spend', 0)) or 0),
+                    'daily_budget': float(
+                        api_cam.get('daily_budget', api_cam.get('budget', 0)) or 0),
+                    'roas': float(api_cam.get('roas', 0) or 0),
+                }
+                # diff เหมือน _merge_live_data - ค่าไม่ขยับก็ไม่ต้องเขียน
+                # (เขียนทุกรอบ = ปลุก listener ตัวเองวนไม่จบ)
+                prev = self._last_api.get(cam_id, {})
+                changed = False
+                for k, v in new.items():
+                    if prev.get(k) != v:
+                        batch[f'shopee_ads/campaigns/{cam_id}/{k}'] = v
+                        changed = True
+                if changed:
+                    # เก็บเป็น epoch-ms เหมือน field เวลาอื่นๆ - เบากว่า string
+                    # และ query ช่วงเวลาด้วย orderByChild ฝั่ง server ได้
+                    batch[f'shopee_ads/campaigns/{cam_id}/last_update_ms'] = now_ms
+                self._last_api[cam_id] = new
+                break
+        if batch:
+            self.fb.get_ref('/').update(batch)
+            _bump_rev(self.fb, 'campaigns')
+
+    def run_cycle(self):
+        start = time.time()
+        # อ่าน rev ก้อนเล็กๆ ก่อน แล้วค่อยดึงเฉพาะ subtree ที่เปลี่ยนจริง
+        revs = self.fb.read('shopee_ads/meta/revs') or {}
+        campaigns = self._read_section('campaigns', 'shopee_ads/campaigns', revs)
+        if not campaigns:
+            return
+        live_data = self._read_section('live', 'shopee_monitor/live_shopee', revs)
+        # สร้าง index ชื่อช่องรอบละครั้ง - ทุก lookup ถัดจากนี้เป็น O(1)
+        live_idx = LiveIndex(live_data)
+
+        # โหลดชีตใหม่ทุก 30 นาที (เอา cookie ล่าสุด)
+        if time.time() - self.last_sheet_load > 1800:
+            self.data_dict = DataLoader.load_channel_data()
+            self._cookie_idx = self._build_cookie_idx()
+            self.last_sheet_load = time.time()
+
+        self._merge_live_data(campaigns, live_idx)
+        self._update_campaigns_from_api(campaigns)
+
+        # snapshot ทุก 5 นาที
+        if time.time() - self.snapshots.last_snapshot_time >= Config.SNAPSHOT_INTERVAL_SEC:
+            self.snapshots.take_snapshot(campaigns, live_idx)
+
+        snapshots = self._read_section('snapshots', 'shopee_ads/snapshots', revs)
+        actions = self.engine.evaluate_all(campaigns, snapshots, live_idx,
+                                           snap_rev=revs.get('snapshots'),
+                                           now=start)
+        if actions:
+            # ยิงทุก action พร้อมกัน (คนละ campaign ไม่ชนกัน) แทนไล่ทีละตัว
+            list(self._pool.map(
+                lambda a: self.engine.execute_action(
+                    a, self._get_cookie_for_channel(a.get('channel', ''))),
+                actions))
+
+        # ล้าง snapshot เก่าชั่วโมงละครั้ง
+        if time.time() - self.last_cleanup >= CLEANUP_INTERVAL_SEC:
+            # เอาแค่รายชื่อ campaign ที่มี snapshot จริง ไม่ต้องลากข้อมูลเต็ม
+            self.snapshots.cleanup_old_snapshots(
+                self.fb.read_shallow('shopee_ads/snapshots'))
+            self.last_cleanup = time.time()
+
+        print(f"รอบ auto budget: {time.time()-start:.2f} วินาที "
+              f"({len(actions)} action)")
+
+    def next_wake(self):
+        """เวลาตื่นรอบถัดไป = อันที่ใกล้สุดของ: schedule ถัดไป / โหมดแข่งครบ
+        interval / snapshot ครบ 5 นาที - ไม่มีอะไรถึงคิวก็ไม่ต้องตื่นมาเปล่าๆ"""
+        now = time.time()
+        wake_at = self.snapshots.last_snapshot_time + Config.SNAPSHOT_INTERVAL_SEC
+        now_dt = datetime.fromtimestamp(now)
+        midnight = now - (now_dt.hour * 3600 + now_dt.minute * 60
+                          + now_dt.second + now_dt.microsecond / 1e6)
+        campaigns = self._cache.get('campaigns', (None, {}))[1]
+        for cam in campaigns.values():
+            if not isinstance(cam, dict) or cam.get('auto_enabled') is False:
+                continue
+            sched = cam.get('schedule_times', '')
+            if sched:
+                for m in _parse_sched(str(sched)):
+                    t = midnight + m * 60
+                    if t <= now:
+                        t += 86400  # นาทีนี้ผ่านไปแล้ว -> รอบพรุ่งนี้
+                    wake_at = min(wake_at, t)
+            if cam.get('mode', 'normal') == 'competition':
+                interval = float(cam.get('competition_interval', 30) or 30)
+                last = float(cam.get('last_auto_action', 0) or 0) / 1000.0
+                wake_at = min(wake_at, max(last + interval * 60, now + 1))
+        # อย่าคืนเวลาในอดีต (เช่น last_snapshot_time ยังเป็น 0.0 ตอนเพิ่งเปิด
+        # แล้ว campaigns ว่าง) - ไม่งั้น loop จะตื่นรัวแบบไม่หลับเลย
+        return max(wake_at, now + MIN_EVAL_GAP_SEC)
+
+
+def main():
+    monitor = AdsMonitor()
+    print("🚀 เริ่ม Auto Budget Engine...")
+    wake_at = 0.0
+    while True:
+        try:
+            if monitor._dirty or time.time() >= wake_at:
+                monitor._dirty = False
+                monitor.run_cycle()
+                wake_at = monitor.next_wake()
+        except Exception as e:
+            log.error('รอบ auto budget พัง: %s', e)
+            wake_at = time.time() + Config.FETCH_INTERVAL_SEC
+        # พักขั้นต่ำเสมอ - write ของรอบเราเองก็ปลุก listener ติดธง dirty ได้
+        # ไม่มีช่องหายใจตรงนี้ = วนประเมินรัวใส่ Firebase ไม่จบ
+        time.sleep(MIN_EVAL_GAP_SEC)
+        # จากนั้นหลับต่อจนถึงคิวงานถัดไป เป็นช่วงสั้นๆ เผื่อ dirty มาปลุกก่อน
+        sleep_until = min(wake_at, time.time() + MAX_SLEEP_SEC)
+        while time.time() < sleep_until and not monitor._dirty:
+            time.sleep(max(1.0, min(MIN_EVAL_GAP_SEC,
+                                    sleep_until - time.time())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,804 @@
+# shopee_ads_monitor.py
+# ========================================
+# Shopee Ads Monitor
+# ดึง balance + campaign ของ Shopee Ads ทุกช่อง แล้วอัพขึ้น Firebase
+# ทำงานคู่กับ bot live (data_dict จาก Google Sheet เดิม)
+# เก็บ Snapshot ทุก 5 นาที สำหรับวัดผล 15/60/180 นาที
+# ========================================
+
+import asyncio
+import functools
+import hashlib
+import io
+import json
+import logging
+import random
+import re
+import time
+from types import MappingProxyType
+
+import diskcache
+import httpx
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import firebase_admin
+from firebase_admin import credentials, db
+
+try:
+    import orjson  # decode เร็วกว่า stdlib json หลายเท่า (ตัวเลือกเสริม)
+except ImportError:
+    orjson = None
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s %(levelname)s %(message)s')
+log = logging.getLogger('ads_monitor')
+
+
+# ========================================
+# Config
+# ========================================
+class Config:
+    # --- Shopee ---
+    SHOPEE_CREATOR_BASE = "https://creator.shopee.co.th"
+    SHOPEE_SELLER_BASE = "https://seller.shopee.co.th"
+
+    # endpoint ที่เจอจาก shopee_ads_api_test.py (Phase 1)
+    # ตัวไหนยังหาไม่เจอปล่อย '' ไว้ก่อน -> method ที่ใช้จะ return None
+    USER_INFO_URL = "/supply/api/lm/sellercenter/userInfo"
+    ADS_BALANCE_URL = "/supply/api/lm/sellercenter/ads/balance"
+    ADS_CAMPAIGN_LIST_URL = "/supply/api/lm/sellercenter/ads/campaign/list"
+    ADS_BUDGET_URL = ""       # ยังไม่เจอ endpoint ตั้ง budget
+    ADS_PAUSE_URL = ""        # ยังไม่เจอ
+    ADS_RESUME_URL = ""       # ยังไม่เจอ
+
+    # --- Google Sheet (ชีตเดียวกับ bot live) ---
+    SHEET_ID = "1b2zDX1SOf57Sr1s3aNUbxatR9UJHtwdoPSv4XnUNGX4"
+    SHEET_GID = "1151548269"  # หน้า coins
+
+    # --- Firebase ---
+    FIREBASE_KEY_FILE = 'monitershopee-firebase-key.json'
+    FIREBASE_DB_URL = 'https://monitershopee-default-rtdb.asia-southeast1.firebasedatabase.app'
+
+    # --- รอบการทำงาน ---
+    FETCH_INTERVAL_SEC = 180      # ดึงข้อมูลทุก 3 นาที
+    SNAPSHOT_INTERVAL_SEC = 300   # snapshot ทุก 5 นาที
+
+    # --- Budget ---
+    MIN_BUDGET = 100
+    BUDGET_STEP = 25
+    VALID_ENDINGS = frozenset((0, 25, 50, 75))
+
+    # URL เต็ม (base + path) - เซ็ตโดย resolve() ครั้งเดียวตอน import
+    USER_INFO_FULL_URL = ''
+    ADS_BALANCE_FULL_URL = ''
+    ADS_CAMPAIGN_LIST_FULL_URL = ''
+    ADS_BUDGET_FULL_URL = ''
+    ADS_PAUSE_FULL_URL = ''
+    ADS_RESUME_FULL_URL = ''
+
+    @classmethod
+    def resolve(cls):
+        """ต่อ string URL ครั้งเดียว แทนต่อใหม่ทุก call ใน hot path"""
+        for name in ('USER_INFO', 'ADS_BALANCE', 'ADS_CAMPAIGN_LIST',
+                     'ADS_BUDGET', 'ADS_PAUSE', 'ADS_RESUME'):
+            path = getattr(cls, name + '_URL')
+            setattr(cls, name + '_FULL_URL',
+                    cls.SHOPEE_CREATOR_BASE + path if path else '')
+
+
+Config.resolve()
+
+
+# ========================================
+# Cookie / Headers
+# ========================================
+# cookie string เดิมถูก parse ซ้ำทุก call (balance + campaigns + อื่นๆ ต่อรอบ)
+# memoize ไว้ - จ่ายค่า split แค่ครั้งเดียวต่อ cookie ที่ไม่ซ้ำกัน
+_COOKIE_RE = re.compile(r'([^=;\s]+)=([^;]*)')
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_cookies_cached(cookie_str):
+    # scan รอบเดียวด้วย regex แทน split ซ้อน split
+    # คืนเป็น tuple (immutable) ให้ lru_cache เก็บได้
+    return tuple((m.group(1), m.group(2).strip())
+                 for m in _COOKIE_RE.finditer(cookie_str))
+
+
+def parse_cookies(cookie_str):
+    return dict(_parse_cookies_cached(cookie_str or ''))
+
+
+@functools.lru_cache(maxsize=256)
+def _headers_cached(csrf):
+    # MappingProxyType = อ่านอย่างเดียว ทุก caller ใช้ object เดียวกันได้
+    return MappingProxyType({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Content-Type': 'application/json',
+        'x-csrftoken': csrf,
+        'Referer': 'https://creator.shopee.co.th/insight/live/list',
+    })
+
+
+def get_headers(cookies):
+    return _headers_cached(cookies.get('csrftoken', ''))
+
+
+@functools.lru_cache(maxsize=256)
+def _headers_with_cookie(csrf, cookie_str):
+    h = dict(_headers_cached(csrf))
+    h['Cookie'] = cookie_str
+    return MappingProxyType(h)
+
+
+def get_headers_for(cookie_str):
+    """headers พร้อม Cookie header ตรงๆ - ห้ามส่ง cookies= บน session กลาง
+    ไม่งั้น Set-Cookie ของช่องหนึ่งค้างใน jar แล้วหลุดไปปนช่องอื่น
+    (มี Cookie header อยู่แล้ว jar จะไม่ยุ่งกับ request นี้)"""
+    cookie_str = cookie_str or ''
+    csrf = parse_cookies(cookie_str).get('csrftoken', '')
+    return _headers_with_cookie(csrf, cookie_str)
+
+
+def _json(resp):
+    """decode response body (requests) - ใช้ orjson ถ้ามี"""
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+
+def _json_bytes(body):
+    """decode response body ที่อ่านมาเป็น bytes แล้ว"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+# เช็ค/แกะ shape ของ response ที่ใช้ซ้ำทุก endpoint - รวมไว้ที่เดียว
+def _is_ok(data):
+    return bool(data) and (data.get('code') == 0 or data.get('success') is True)
+
+
+def _safe(d, *keys, default=None):
+    """ไล่ key ลงไปทีละชั้น คืน default ถ้าเจอทางตันระหว่างทาง"""
+    for k in keys:
+        d = d.get(k) if isinstance(d, dict) else None
+        if d is None:
+            return default
+    return d
+
+
+def clean_channel_name(channel_name):
+    """แปลงชื่อช่องเป็น Firebase path ที่ใช้ได้"""
+    if not channel_name:
+        return channel_name
+    cleaned = str(channel_name)
+    for ch in ('.', '$', '#', '[', ']', '/'):
+        cleaned = cleaned.replace(ch, '_' if ch in ('.', '/') else '')
+    return cleaned
+
+
+# ========================================
+# Response cache (disk) - balance/campaigns เปลี่ยนช้ากว่ารอบดึงมาก
+# ตอน restart หรือยิงถี่ๆ จะได้อ่านจาก disk แทนยิง Shopee ซ้ำ
+# ========================================
+# session กลางสำหรับงาน sync นอก client (เช่นโหลดชีต) - reuse connection เดิม
+SESSION = requests.Session()
+
+CACHE = diskcache.Cache('.ads_cache', size_limit=200 * 1024 * 1024)
+BALANCE_TTL_SEC = 60
+CAMPAIGNS_TTL_SEC = 30
+
+
+def _cookie_hash(cookie_str):
+    return hashlib.blake2b((cookie_str or '').encode(), digest_size=16).hexdigest()
+
+
+def _invalidate_reads(cookie_str):
+    """ลบ cache หลัง write กันอ่านค่าเก่า"""
+    h = _cookie_hash(cookie_str)
+    CACHE.delete(('balance', h))
+    CACHE.delete(('campaigns', h))
+
+
+# ========================================
+# Firebase
+# ========================================
+class FirebaseManager:
+    def __init__(self):
+        try:
+            firebase_admin.get_app()
+        except ValueError:
+            cred = credentials.Certificate(Config.FIREBASE_KEY_FILE)
+            firebase_admin.initialize_app(cred, {'databaseURL': Config.FIREBASE_DB_URL})
+            log.info('Firebase เชื่อมต่อสำเร็จ')
+
+    def get_ref(self, path):
+        return db.reference(path)
+
+    def read(self, path):
+        try:
+            return self.get_ref(path).get()
+        except Exception as e:
+            log.error('Firebase read error (%s): %s', path, e)
+            return None
+
+    def read_shallow(self, path):
+        """อ่านเฉพาะ key ชั้นแรกของ path (REST ?shallow=true)
+        เอาไว้ตอนต้องการแค่รายชื่อ key ไม่ต้องลาก subtree ทั้งก้อนมาทิ้ง"""
+        try:
+            token = (firebase_admin.get_app().credential
+                     .get_access_token().access_token)
+            resp = SESSION.get(
+                f'{Config.FIREBASE_DB_URL}/{path}.json',
+                params={'shallow': 'true', 'access_token': token},
+                timeout=10)
+            data = resp.json() if resp.status_code == 200 else None
+            return set(data) if isinstance(data, dict) else set()
+        except Exception as e:
+            log.error('Firebase read_shallow error (%s): %s', path, e)
+            return set()
+
+    def write(self, path, data):
+        try:
+            self.get_ref(path).set(data)
+            return True
+        except Exception as e:
+            log.error('Firebase write error (%s): %s', path, e)
+            return False
+
+    def update(self, path, data):
+        try:
+            self.get_ref(path).update(data)
+            return True
+        except Exception as e:
+            log.error('Firebase update error (%s): %s', path, e)
+            return False
+
+    def batch_update(self, root, updates):
+        """multi-path update: เขียนหลาย child ใต้ root ในยิงเดียว (1 RTT)
+        updates = {'relative/path': value, ...}"""
+        try:
+            self.get_ref(root).update(updates)
+            return True
+        except Exception as e:
+            log.error('Firebase batch_update error (%s): %s', root, e)
+            return False
+
+    def push(self, path, data):
+        try:
+            self.get_ref(path).push(data)
+            return True
+        except Exception as e:
+            log.error('Firebase push error (%s): %s', path, e)
+            return False
+
+    def delete(self, path):
+        try:
+            self.get_ref(path).delete()
+            return True
+        except Exception as e:
+            log.error('Firebase delete error (%s): %s', path, e)
+            return False
+
+
+# ========================================
+# Shopee Ads Client (sync - ใช้ตอนยิงทีละ call เช่นใน engine)
+# ========================================
+class ShopeeAdsClient:
+    """client แบบ sync
+
+    endpoint ไหนยังไม่ config (ค่า '' ใน Config) จะถูกผูกเป็น noop ตั้งแต่
+    __init__ -> ตอนรัน discovery-only mode จะไม่เสียค่า parse cookie /
+    สร้าง header ให้ call ที่ยังไงก็ไม่ได้ยิง"""
+
+    def __init__(self):
+        self.session = requests.Session()
+        # retry ใน client เลย - error ชั่วคราวหายเองใน ~1s ไม่ต้องรอรอบถัดไป
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=4, pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[429, 502, 503, 504],
+                              allowed_methods={'GET', 'POST'})))
+        if not Config.ADS_BALANCE_URL:
+            self.get_ads_balance = lambda *_a, **_k: None
+        if not Config.ADS_CAMPAIGN_LIST_URL:
+            self.get_ads_campaigns = lambda *_a, **_k: None
+        if not Config.ADS_BUDGET_URL:
+            self.set_campaign_budget = lambda *_a, **_k: False
+        if not Config.ADS_PAUSE_URL:
+            self.pause_campaign = lambda *_a, **_k: False
+        if not Config.ADS_RESUME_URL:
+            self.resume_campaign = lambda *_a, **_k: False
+
+    def verify_auth(self, cookie_str):
+        """เช็คว่า cookie ยังใช้ได้ + คืนชื่อ user"""
+        headers = get_headers_for(cookie_str)
+        url = Config.USER_INFO_FULL_URL
+        try:
+            resp = self.session.get(url, headers=headers, timeout=10)
+            if resp.status_code != 200:
+                return None
+            data = _json(resp)
+            return _safe(data, 'data', 'userName') or _safe(data, 'data', 'name')
+        except Exception as e:
+            log.error('verify_auth error: %s', e)
+            return None
+
+    def get_ads_balance(self, cookie_str):
+        key = ('balance', _cookie_hash(cookie_str))
+        cached = CACHE.get(key)
+        if cached is not None:
+            return cached
+        headers = get_headers_for(cookie_str)
+        url = Config.ADS_BALANCE_FULL_URL
+        try:
+            resp = self.session.get(url, headers=headers, timeout=10)
+            if resp.status_code != 200:
+                return None
+            data = _json(resp)
+            result = data.get('data')
+            if result is not None:
+                CACHE.set(key, result, expire=BALANCE_TTL_SEC)
+            return result
+        except Exception as e:
+            log.error('get_ads_balance error: %s', e)
+            return None
+
+    def get_ads_campaigns(self, cookie_str):
+        key = ('campaigns', _cookie_hash(cookie_str))
+        cached = CACHE.get(key)
+        if cached is not None:
+            return cached
+        headers = get_headers_for(cookie_str)
+        url = Config.ADS_CAMPAIGN_LIST_FULL_URL
+        try:
+            resp = self.session.get(url, headers=headers,
+                                    params={'page': 1, 'pageSize': 50}, timeout=10)
+            if resp.status_code != 200:
+                return None
+            data = _json(resp)
+            result = _safe(data, 'data', 'list') or _safe(data, 'data') or []
+            if result is not None:
+                CACHE.set(key, result, expire=CAMPAIGNS_TTL_SEC)
+            return result
+        except Exception as e:
+            log.error('get_ads_campaigns error: %s', e)
+            return None
+
+    def set_campaign_budget(self, cookie_str, campaign_id, budget):
+        headers = get_headers_for(cookie_str)
+        url = Config.ADS_BUDGET_FULL_URL
+        try:
+            resp = self.session.post(url, headers=headers,
+                                     json={'campaign_id': campaign_id, 'budget': budget},
+                                     timeout=10)
+            data = _json(resp)
+            ok = _is_ok(data)
+            if ok:
+                _invalidate_reads(cookie_str)
+            return ok
+        except Exception as e:
+            log.error('set_campaign_budget error: %s', e)
+            return False
+
+    def pause_campaign(self, cookie_str, campaign_id):
+        headers = get_headers_for(cookie_str)
+        url = Config.ADS_PAUSE_FULL_URL
+        try:
+            resp = self.session.post(url, headers=headers,
+                                     json={'campaign_id': campaign_id}, timeout=10)
+            data = _json(resp)
+            ok = _is_ok(data)
+            if ok:
+                _invalidate_reads(cookie_str)
+            return ok
+        except Exception as e:
+            log.error('pause_campaign error: %s', e)
+            return False
+
+    def resume_campaign(self, cookie_str, campaign_id):
+        headers = get_headers_for(cookie_str)
+        url = Config.ADS_RESUME_FULL_URL
+        try:
+            resp = self.session.post(url, headers=headers,
+                                     json={'campaign_id': campaign_id}, timeout=10)
+            data = _json(resp)
+            ok = _is_ok(data)
+            if ok:
+                _invalidate_reads(cookie_str)
+            return ok
+        except Exception as e:
+            log.error('resume_campaign error: %s', e)
+            return False
+
+
+# ========================================
+# Shopee Ads Client (async - ใช้ยิงหลายช่องพร้อมกันในรอบ monitor)
+# httpx HTTP/2: request หลายตัวแชร์ connection เดียว (multiplex)
+# + Semaphore กันยิงรัวเกิน
+# ========================================
+async def _async_none(*_a, **_k):
+    return None
+
+
+async def _async_false(*_a, **_k):
+    return False
+
+class AsyncShopeeAdsClient:
+    """client แบบ async
+
+    endpoint ที่ยังไม่ config ถูกผูกเป็น async noop ตั้งแต่ __init__
+    เหมือนฝั่ง sync - hot path ของ gather ไม่ต้องเช็ค Config ทุก call"""
+
+    def __init__(self):
+        self.client = None
+        self.sem = None
+        # ETag ต่อ (endpoint, cookie) - ถ้า server ตอบ 304 ใช้ body เดิมได้เลย
+        self._etags = {}
+        self._last_body = {}
+        # single-flight: call ซ้ำ key เดียวกันที่กำลังบินอยู่ รอผลร่วมกัน
+        self._inflight = {}
+        if not Config.ADS_BALANCE_URL:
+            self.get_ads_balance = _async_none
+        if not Config.ADS_CAMPAIGN_LIST_URL:
+            self.get_ads_campaigns = _async_none
+        if not Config.ADS_BUDGET_URL:
+            self.set_campaign_budget = _async_false
+        if not Config.ADS_PAUSE_URL:
+            self.pause_campaign = _async_false
+        if not Config.ADS_RESUME_URL:
+            self.resume_campaign = _async_false
+
+    async def _ensure_session(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=32,
+                                    max_keepalive_connections=8,
+                                    keepalive_expiry=60),
+                timeout=httpx.Timeout(10.0))
+            self.sem = asyncio.Semaphore(32)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _request(self, method, url, cookie_str, params=None, payload=None,
+                       cond_key=None):
+        """ยิง 1 request พร้อม retry (backoff + jitter) เมื่อเจอ 429/5xx/timeout
+        จะได้ไม่ต้องรอรอบถัดไป (180s) เพราะ error ชั่วคราว
+
+        cond_key: ใส่แล้วจะยิงแบบ conditional GET (If-None-Match) -
+        ถ้าข้อมูลไม่เปลี่ยน server ตอบ 304 ตัวเปล่า ไม่ต้อง decode อะไรเลย"""
+        await self._ensure_session()
+        # Cookie header ตรงๆ เหมือนฝั่ง sync - กัน jar ของ client กลางปนข้ามช่อง
+        # (httpx >=0.28 เลิกรับ cookies= ต่อ request แล้วด้วย)
+        headers = dict(get_headers_for(cookie_str))
+        if cond_key is not None:
+            etag = self._etags.get(cond_key)
+            if etag:
+                headers['If-None-Match'] = etag
+        last_err = None
+        for i in range(3):
+            try:
+                async with self.sem:
+                    resp = await self.client.request(
+                        method, url, headers=headers,
+                        params=params, json=payload)
+                if resp.status_code in (429, 502, 503, 504):
+                    retry_after = resp.headers.get('Retry-After')
+                    if retry_after:
+                        delay = float(retry_after)
+                    else:
+                        delay = 0.3 * (2 ** i) + random.random() * 0.1
+                    await asyncio.sleep(delay)
+                    continue
+                if resp.status_code == 304 and cond_key is not None:
+                    return self._last_body.get(cond_key)
+                if resp.status_code != 200:
+                    return None
+                data = _json_bytes(resp.content)
+                if cond_key is not None:
+                    etag = resp.headers.get('ETag')
+                    if etag:
+                        self._etags[cond_key] = etag
+                        self._last_body[cond_key] = data
+                return data
+            except httpx.HTTPError as e:
+                last_err = e
+                await asyncio.sleep(0.3 * (2 ** i) + random.random() * 0.1)
+        if last_err is not None:
+            raise last_err
+        return None
+
+    async def _single_flight(self, key, coro_fn):
+        """หลายช่องในชีตอาจใช้ cookie เดียวกัน - ถ้า request key เดียวกัน
+        กำลังบินอยู่แล้ว รอ future ของตัวนั้นแทนการยิงซ้ำ"""
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await fut
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            res = await coro_fn()
+            fut.set_result(res)
+            return res
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _get(self, url, cookie_str, params=None, cond_key=None):
+        return await self._request('GET', url, cookie_str, params=params,
+                                   cond_key=cond_key)
+
+    async def _post(self, url, cookie_str, payload):
+        return await self._request('POST', url, cookie_str, payload=payload)
+
+    async def verify_auth(self, cookie_str):
+        url = Config.USER_INFO_FULL_URL
+        try:
+            data = await self._get(url, cookie_str)
+            if not data:
+                return None
+            return _safe(data, 'data', 'userName') or _safe(data, 'data', 'name')
+        except Exception as e:
+            log.error('verify_auth error: %s', e)
+            return None
+
+    async def get_ads_balance(self, cookie_str):
+        key = ('balance', _cookie_hash(cookie_str))
+        cached = CACHE.get(key)
+        if cached is not None:
+            return cached
+        return await self._single_flight(
+            key, lambda: self._fetch_balance(key, cookie_str))
+
+    async def _fetch_balance(self, key, cookie_str):
+        url = Config.ADS_BALANCE_FULL_URL
+        try:
+            data = await self._get(url, cookie_str, cond_key=key)
+            if not data:
+                return None
+            result = data.get('data')
+            if result is not None:
+                CACHE.set(key, result, expire=BALANCE_TTL_SEC)
+            return result
+        except Exception as e:
+            log.error('get_ads_balance error: %s', e)
+            return None
+
+    async def get_ads_campaigns(self, cookie_str):
+        key = ('campaigns', _cookie_hash(cookie_str))
+        cached = CACHE.get(key)
+        if cached is not None:
+            return cached
+        return await self._single_flight(
+            key, lambda: self._fetch_campaigns(key, cookie_str))
+
+    async def _fetch_campaigns(self, key, cookie_str):
+        url = Config.ADS_CAMPAIGN_LIST_FULL_URL
+        try:
+            data = await self._get(url, cookie_str,
+                                   params={'page': 1, 'pageSize': 50}, cond_key=key)
+            if not data:
+                return None
+            result = _safe(data, 'data', 'list') or _safe(data, 'data') or []
+            if result is not None:
+                CACHE.set(key, result, expire=CAMPAIGNS_TTL_SEC)
+            return result
+        except Exception as e:
+            log.error('get_ads_campaigns error: %s', e)
+            return None
+
+    async def set_campaign_budget(self, cookie_str, campaign_id, budget):
+        url = Config.ADS_BUDGET_FULL_URL
+        try:
+            data = await self._post(url, cookie_str,
+                                    {'campaign_id': campaign_id, 'budget': budget})
+            ok = _is_ok(data)
+            if ok:
+                _invalidate_reads(cookie_str)
+            return ok
+        except Exception as e:
+            log.error('set_campaign_budget error: %s', e)
+            return False
+
+    async def pause_campaign(self, cookie_str, campaign_id):
+        url = Config.ADS_PAUSE_FULL_URL
+        try:
+            data = await self._post(url, cookie_str, {'campaign_id': campaign_id})
+            ok = _is_ok(data)
+            if ok:
+                _invalidate_reads(cookie_str)
+            return ok
+        except Exception as e:
+            log.error('pause_campaign error: %s', e)
+            return False
+
+    async def resume_campaign(self, cookie_str, campaign_id):
+        url = Config.ADS_RESUME_FULL_URL
+        try:
+            data = await self._post(url, cookie_str, {'campaign_id': campaign_id})
+            ok = _is_ok(data)
+            if ok:
+                _invalidate_reads(cookie_str)
+            return ok
+        except Exception as e:
+            log.error('resume_campaign error: %s', e)
+            return False
+
+
+# ========================================
+# โหลด data_dict จาก Google Sheet (แบบเดียวกับ sheet_master ของ bot live)
+# ========================================
+class DataLoader:
+    @staticmethod
+    def load_channel_data():
+        """คืน data_dict[name] = {cookie, status, phone, server, admin, ...}"""
+        data_dict = {}
+        start = time.time()
+        url = (f"https://docs.google.com/spreadsheets/d/{Config.SHEET_ID}"
+               f"/export?format=csv&gid={Config.SHEET_GID}")
+        try:
+            resp = SESSION.get(url, timeout=30)
+            resp.raise_for_status()
+            # header จริงของชีตอยู่บรรทัดที่ 10 ของไฟล์ (index 9)
+            # dtype=str + na_filter=False -> ไม่ต้องเดา type / ไม่มี NaN ให้ล้าง
+            df = pd.read_csv(io.BytesIO(resp.content), header=9, nrows=10001,
+                             dtype=str, keep_default_na=False, na_filter=False)
+        except Exception as e:
+            log.error('โหลดชีตไม่ได้: %s', e)
+            return data_dict
+
+        fields = ["no", "black", "cookie", "last_cookie", "sim", "server",
+                  "basket", "phone", "status", "day", "admin", "data"]
+        cols = [c for c in df.columns if c in fields]
+        if 'name' not in df.columns:
+            log.error('ไม่เจอคอลัมน์ name ในแถว header')
+            return data_dict
+
+        names = df['name'].str.strip()
+        mask = names.ne('')
+        sub = df.loc[mask, cols].apply(lambda s: s.str.strip())
+        sub.index = names[mask]
+        # ชีตมีชื่อช่องซ้ำได้ - เก็บแถวล่างสุด (เหมือน loop เดิมที่เขียนทับ)
+        # ไม่งั้น to_dict(orient='index') เจอ index ซ้ำแล้ว raise ทั้งฟังก์ชัน
+        sub = sub[~sub.index.duplicated(keep='last')]
+        data_dict = sub.to_dict(orient='index')
+
+        log.info('โหลดชีต %d ช่อง (%.2fs)', len(data_dict), time.time() - start)
+        return data_dict
+
+
+# ========================================
+# Budget helper
+# ========================================
+class BudgetManager:
+    _VALID_SET = frozenset(Config.VALID_ENDINGS)
+
+    @staticmethod
+    def round_up(amount):
+        """ปัดขึ้นเป็น step ละ 25 และไม่ต่ำกว่า MIN_BUDGET
+        คิดเป็น int ล้วน (ceil-div ด้วย floor-div ติดลบ) - ไม่มี float ปน
+        เลยไม่โดนเคสทศนิยมเพี้ยนจาก API เช่น 199.9999999"""
+        n = int(amount)
+        return max(Config.MIN_BUDGET, -(-n // Config.BUDGET_STEP) * Config.BUDGET_STEP)
+
+    @staticmethod
+    def calc_increment(budget):
+        """ขั้นการเพิ่ม budget ตามขนาด budget ปัจจุบัน"""
+        if budget < 500:
+            step = 100
+        elif budget < 2000:
+            step = 200
+        else:
+            step = 500
+        return BudgetManager.round_up(budget + step) - int(budget)
+
+    @staticmethod
+    def validate(amount):
+        """budget ต้องลงท้ายด้วย 0/25/50/75 และไม่ต่ำกว่าขั้นต่ำ"""
+        if amount < Config.MIN_BUDGET:
+            return False
+        remainder = int(amount) % 100
+        if remainder not in BudgetManager._VALID_SET:
+            return False
+        return True
+
+
+# ========================================
+# รอบ monitor: ยิง balance + campaigns ทุกช่องพร้อมกัน แล้วอัพ Firebase
+# ========================================
+async def fetch_channel(client, name, row):
+    """ดึง balance + campaigns ของ 1 ช่อง"""
+    cookie_str = row.get('cookie', '')
+    if not cookie_str or cookie_str == ' ':
+        return None
+    balance, campaigns = await asyncio.gather(
+        client.get_ads_balance(cookie_str),
+        client.get_ads_campaigns(cookie_str))
+    return {'name': name, 'balance': balance, 'campaigns': campaigns}
+
+
+async def tick(client, fb, data_dict):
+    start = time.time()
+    rows = {name: row for name, row in data_dict.items()
+            if row.get('status', '') == 'ไลพ์'}
+    print(f"🚀 ดึงข้อมูล Ads {len(rows)} ช่อง...")
+
+    results = await asyncio.gather(
+        *[fetch_channel(client, name, row) for name, row in rows.items()],
+        return_exceptions=True)
+
+    now_ms = int(time.time() * 1000)
+    # รวมทุกช่องเป็น multi-path update เดียว -> ยิง Firebase แค่ 1 ครั้งต่อรอบ
+    payload = {}
+    count = 0
+    for res in results:
+        if isinstance(res, Exception) or res is None:
+            continue
+        ch = clean_channel_name(res['name'])
+        # ดึงพลาด (None/ว่าง) ห้ามใส่ลง batch - null ใน multi-path update
+        # แปลว่า "ลบ" จะไปกวาดค่าดีๆ ที่ค้างบน Firebase ทิ้ง
+        if res['balance'] is not None:
+            payload[f'{ch}/balance'] = res['balance']
+        if res['campaigns']:
+            payload[f'{ch}/campaigns'] = res['campaigns']
+        payload[f'{ch}/ts'] = now_ms
+        count += 1
+    if payload:
+        # Firebase SDK เป็น sync (block) - โยนเข้า executor กัน event loop ค้าง
+        await asyncio.get_running_loop().run_in_executor(
+            None, fb.batch_update, 'shopee_ads/channels', payload)
+    print(f"✅ อัพโหลด {count} ช่อง ({time.time()-start:.2f} วินาที)")
+
+
+async def periodic(fn, interval_sec):
+    """เรียก fn ซ้ำทุก interval_sec (หักเวลาที่รอบนั้นใช้ไปแล้ว)"""
+    while True:
+        started = time.time()
+        try:
+            await fn()
+        except Exception as e:
+            log.error('รอบนี้พัง: %s', e)
+        await asyncio.sleep(max(1.0, interval_sec - (time.time() - started)))
+
+
+async def amain():
+    fb = FirebaseManager()
+    client = AsyncShopeeAdsClient()
+    loop = asyncio.get_running_loop()
+    state = {
+        'data_dict': await loop.run_in_executor(None, DataLoader.load_channel_data),
+        'last_sheet_load': time.time(),
+    }
+
+    async def cycle():
+        start = time.time()
+        # โหลดชีตใหม่ทุก 30 นาที (pandas+HTTP เป็นงาน blocking -> executor)
+        if time.time() - state['last_sheet_load'] > 1800:
+            state['data_dict'] = await loop.run_in_executor(
+                None, DataLoader.load_channel_data)
+            state['last_sheet_load'] = time.time()
+        await tick(client, fb, state['data_dict'])
+        print(f"รอบการทำงาน: {time.time()-start:.2f} วินาที")
+
+    try:
+        await periodic(cycle, Config.FETCH_INTERVAL_SEC)
+    finally:
+        await client.close()
+
+
+def main():
+    asyncio.run(amain())
+
+
+if __name__ == '__main__':
+    main()